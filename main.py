@@ -4,7 +4,7 @@ from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 from uuid import uuid4
 from PIL import Image, ImageEnhance, ImageDraw
 from reportlab.pdfgen import canvas
@@ -15,6 +15,8 @@ from reportlab.lib import colors as rl_colors
 from reportlab.lib.units import mm
 import numpy as np
 import os
+import io
+import base64
 import cv2
 import traceback
 import tempfile
@@ -62,6 +64,21 @@ if not os.path.exists("static"):
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 
+# Dice face -> RGB, shared by the PDF dice map and the /analyze previews
+DICE_FACE_RGB = [
+    (17, 17, 17),      # 0 Pure Black
+    (74, 16, 128),     # 1 Deep Purple
+    (26, 58, 170),     # 2 Royal Blue
+    (106, 191, 42),    # 3 Lime Green
+    (245, 197, 24),    # 4 Warm Yellow
+    (224, 120, 48),    # 5 Warm Orange
+    (245, 240, 232),   # 6 Cream White
+]
+DICE_FACE_PALETTE = np.array(DICE_FACE_RGB, dtype=np.uint8)
+
+PREVIEW_FORMATS = {"webp": ("WEBP", "image/webp"), "png": ("PNG", "image/png")}
+
+
 class GridRequest(BaseModel):
     grid_data: List[List[int]]
     style_id: int
@@ -85,19 +102,72 @@ def apply_enhancements(pil_img, brightness, contrast, sharpness, gamma=1.0, clah
     return pil_img
 
 
+def render_grid_preview(grid_arr: np.ndarray, max_dim: int, fmt: str) -> str:
+    """
+    Render a dice grid as a small colour image (one block per cell, using the
+    same palette as the PDF dice map) and return it as a base64 data URL.
+    The longest side is capped at max_dim pixels.
+    """
+    pil_format, content_type = PREVIEW_FORMATS[fmt]
+    rows, cols = grid_arr.shape
+
+    # Vectorized palette lookup: (rows, cols) face values -> (rows, cols, 3) RGB
+    img = Image.fromarray(DICE_FACE_PALETTE[grid_arr], "RGB")
+
+    longest = max(rows, cols)
+    if longest > max_dim:
+        scale = max_dim / longest
+        img = img.resize((max(1, round(cols * scale)), max(1, round(rows * scale))), Image.NEAREST)
+    else:
+        cell = max_dim // longest
+        if cell > 1:
+            img = img.resize((cols * cell, rows * cell), Image.NEAREST)
+
+    buf = io.BytesIO()
+    if pil_format == "WEBP":
+        img.save(buf, format="WEBP", lossless=True, method=4)
+    else:
+        img.save(buf, format="PNG", optimize=True)
+    encoded = base64.b64encode(buf.getvalue()).decode("ascii")
+    return f"data:{content_type};base64,{encoded}"
+
+
 @app.post("/analyze")
 async def analyze_image(
     file: UploadFile = File(...),
     grid_width: int = Form(...),
     grid_height: int = Form(...),
+    previews: bool = Form(False),
+    preview_format: str = Form("webp"),
+    preview_max_dim: int = Form(256),
+    style_id: Optional[int] = Form(None),
 ):
-    print(f"[DEBUG] /analyze received: grid_width={grid_width}, grid_height={grid_height}")
+    """
+    Convert an image into dice grids for each style.
+
+    By default every style's full grid is returned. With previews=true only a
+    small rendered preview image is returned per style; the client then calls
+    again with style_id set to fetch the full grid for the chosen style.
+    """
+    print(f"[DEBUG] /analyze received: grid_width={grid_width}, grid_height={grid_height}, "
+          f"previews={previews}, style_id={style_id}")
     try:
         if grid_width < 10 or grid_height < 10 or grid_width > 1000 or grid_height > 1000:
             return JSONResponse(
                 status_code=400,
                 content={"error": "Grid size out of range. Must be between 10×10 and 1000×1000."}
             )
+        preview_format = preview_format.lower()
+        if previews and preview_format not in PREVIEW_FORMATS:
+            return JSONResponse(
+                status_code=400,
+                content={"error": f"Unsupported preview_format. Must be one of: {', '.join(PREVIEW_FORMATS)}."}
+            )
+        if previews and (preview_max_dim < 16 or preview_max_dim > 1024):
+            return JSONResponse(
+                status_code=400,
+                content={"error": "preview_max_dim out of range. Must be between 16 and 1024."}
+            )
 
         original = Image.open(file.file).convert("L")
 
@@ -114,16 +184,26 @@ async def analyze_image(
             6: {"brightness": 0.8, "contrast": 1.3, "sharpness": 1.7, "clahe": True,  "gamma": 0.9},
         }
 
+        if style_id is not None:
+            if style_id not in style_settings:
+                return JSONResponse(status_code=400, content={"error": f"Unknown style_id {style_id}"})
+            style_settings = {style_id: style_settings[style_id]}
+
         styles = []
-        for style_id, settings in style_settings.items():
+        for sid, settings in style_settings.items():
             processed = apply_enhancements(base.copy(), **settings)
 
-            arr = np.array(processed, dtype=np.float32)
-            print(f"[DEBUG] Style {style_id} -> numpy shape: {arr.shape}")
-            arr = arr.astype(np.uint8)
-            grid = [[int(val / 256 * 7) for val in row] for row in arr.tolist()]
+            arr = np.array(processed, dtype=np.uint8)
+            print(f"[DEBUG] Style {sid} -> numpy shape: {arr.shape}")
+            # Map 0..255 brightness onto dice faces 0..6 (same as int(val / 256 * 7))
+            grid_arr = (arr.astype(np.uint16) * 7 // 256).astype(np.uint8)
 
-            styles.append({"style_id": style_id, "grid": grid, "full_grid": grid})
+            if previews:
+                preview = render_grid_preview(grid_arr, preview_max_dim, preview_format)
+                styles.append({"style_id": sid, "preview": preview})
+            else:
+                grid = grid_arr.tolist()
+                styles.append({"style_id": sid, "grid": grid, "full_grid": grid})
 
         return JSONResponse(content={"styles": styles})
     except Exception as e:
@@ -191,14 +271,10 @@ def generate_better_dice_pdf(filepath, grid, project_name):
     pw, ph = portrait(letter) if rows > cols else landscape(letter)
     margin = 0.25 * inch         # 18 pts
 
+    text_colors = [white, white, white, black, black, black, black]
     color_map = {
-        0: (Color(17/255,  17/255,  17/255),  white),   # Pure Black
-        1: (Color(74/255,  16/255, 128/255),  white),   # Deep Purple
-        2: (Color(26/255,  58/255, 170/255),  white),   # Royal Blue
-        3: (Color(106/255,191/255,  42/255),  black),   # Lime Green
-        4: (Color(245/255,197/255,  24/255),  black),   # Warm Yellow
-        5: (Color(224/255,120/255,  48/255),  black),   # Warm Orange
-        6: (Color(245/255,240/255, 232/255),  black),   # Cream White
+        i: (Color(r / 255, g / 255, b / 255), text_colors[i])
+        for i, (r, g, b) in enumerate(DICE_FACE_RGB)
     }
     color_labels = ["Black", "Purple", "Blue", "Green", "Yellow", "Orange", "White"]
 